@@ -0,0 +1,347 @@
+"""Ingestion benchmark: generates a synthetic Work Order corpus and times each pipeline stage.
+
+    python benchmark_ingestion.py --pdfs 500 --words 500 --output results.json
+    python benchmark_ingestion.py --pdfs 500 --words 500 --baseline results.json
+
+The corpus is QuickBooks-style WO PDFs (Item / Ordered / Description tables)
+and serial-number docx files. It is ingested into a throwaway SQLite
+database unless --db-uri points somewhere else.
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import multiprocessing
+import tempfile
+import threading
+import importlib.util
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INGESTION_SCRIPT = os.path.join(SCRIPT_DIR, "File Script Debug.py")
+# Name the ingester is registered under; its pickled worker jobs refer to it
+INGESTION_MODULE = "file_script_debug"
+
+PART_NUMBERS = [
+    "NRU-52S-JT", "NRU-120S-AWP", "POC-400", "POC-465AWP", "Nuvo-8108GC", "Nuvo-9160GC",
+    "SEMIL-2047GC", "PCIe-PoE354at", "MezIO-D230", "DDR5-32GB", "SSD-1TB-NVMe", "PA-280W-OW",
+    "Cbl-M12A8PM-RJ45", "Wi-Fi-AX210", "GC-Jetson-AGX", "Nuvis-5306RT",
+]
+DESCRIPTIONS = [
+    "Fanless embedded computer", "Power adapter 280W", "NVMe SSD 1TB", "DDR5 memory module",
+    "PoE+ frame grabber card", "M12 to RJ45 cable 2m", "Wi-Fi 6 module with antennas",
+]
+
+# ---- Synthetic corpus ----
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _table_page_stream(rows):
+    """PDF content stream drawing a ruled Item / Ordered / Description table."""
+    column_x = [40, 200, 270, 570]
+    row_height = 18
+    top = 760
+    commands = ["0.5 w"]
+    bottom = top - row_height * len(rows)
+    for y in range(top, bottom - 1, -row_height):
+        commands.append(f"{column_x[0]} {y} m {column_x[-1]} {y} l S")
+    for x in column_x:
+        commands.append(f"{x} {top} m {x} {bottom} l S")
+    for i, row in enumerate(rows):
+        y = top - row_height * (i + 1) + 5
+        for x, value in zip(column_x, row):
+            commands.append(f"BT /F1 9 Tf {x + 3} {y} Td ({_pdf_escape(value)}) Tj ET")
+    return "\n".join(commands).encode("latin-1")
+
+def write_wo_pdf(path, line_items, rows_per_page=30):
+    """Writes a minimal multi-page PDF, one ruled line-item table per page."""
+    header = ["Item", "Ordered", "Description"]
+    pages = [line_items[i:i + rows_per_page] for i in range(0, len(line_items), rows_per_page)] or [[]]
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_rows in pages:
+        stream = _table_page_stream([header] + page_rows)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    with open(path, "wb") as f:
+        f.write(output)
+
+def write_wo_docx(path, product_rows):
+    from docx import Document
+    document = Document()
+    document.add_paragraph("Work Order - Serial Numbers")
+    table = document.add_table(rows=1, cols=4)
+    for cell, title in zip(table.rows[0].cells, ["Product Number", "QTY", "SN", "Notes"]):
+        cell.text = title
+    for product_number, qty, sn, notes in product_rows:
+        cells = table.add_row().cells
+        cells[0].text, cells[1].text, cells[2].text, cells[3].text = product_number, qty, sn, notes
+    document.save(path)
+
+def generate_corpus(corpus_dir, pdf_count, word_count, lines_per_wo, seed=0):
+    """Creates corpus_dir/pdf and corpus_dir/word; returns (pdf_folder, word_folder)."""
+    rng = random.Random(seed)
+    pdf_folder = os.path.join(corpus_dir, "pdf")
+    word_folder = os.path.join(corpus_dir, "word")
+    os.makedirs(pdf_folder, exist_ok=True)
+    os.makedirs(word_folder, exist_ok=True)
+
+    for n in range(pdf_count):
+        line_items = [[rng.choice(PART_NUMBERS), str(rng.randint(1, 20)), rng.choice(DESCRIPTIONS)]
+                      for _ in range(rng.randint(max(1, lines_per_wo // 2), lines_per_wo * 2))]
+        if rng.random() < 0.3:
+            line_items.append(["Forwarding Charge", "1", "Shipping"])
+        write_wo_pdf(os.path.join(pdf_folder, f"WO-{20000 + n}-CUSTOMER{n % 40}.pdf"), line_items)
+
+    for n in range(word_count):
+        product_rows = [(rng.choice(PART_NUMBERS), "1", f"SN{rng.randint(10 ** 7, 10 ** 8 - 1)}", "")
+                        for _ in range(rng.randint(max(1, lines_per_wo // 2), lines_per_wo * 4))]
+        write_wo_docx(os.path.join(word_folder, f"WO-{20000 + n}-CUSTOMER{n % 40}.docx"), product_rows)
+
+    return pdf_folder, word_folder
+
+# ---- Measurement ----
+
+# Seconds between resident-memory samples while a stage runs
+RSS_SAMPLE_INTERVAL = 0.02
+
+def current_rss_bytes():
+    """This process's resident memory now, or None where it can't be read."""
+    try:
+        import psutil  # type: ignore
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def children_rss_bytes():
+    """Combined resident memory of this process's live children (the extraction workers), or None without psutil."""
+    try:
+        import psutil  # type: ignore
+    except ImportError:
+        return None
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:  # exited between listing and reading
+            pass
+    return total
+
+def children_max_rss_mb():
+    """Largest resident memory of any finished child process so far (a lifetime mark, like ru_maxrss), or None."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)  # bytes on macOS, KB elsewhere
+
+class RssSampler:
+    """Samples this process's RSS (and, with children=True, its workers' combined RSS) from a thread.
+
+    ru_maxrss is a high-water mark over the whole process lifetime, so it
+    can't tell one stage from an earlier, hungrier one; peak_mb and
+    children_peak_mb are the highest values seen between start() and stop().
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL, children=False):
+        self.interval = interval
+        self.children = children
+        self.peak = None
+        self.children_peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+        if self.children:
+            rss = children_rss_bytes()
+            if rss is not None and (self.children_peak is None or rss > self.children_peak):
+                self.children_peak = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._sample()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    @property
+    def peak_mb(self):
+        return round(self.peak / 1024 / 1024, 1) if self.peak is not None else None
+
+    @property
+    def children_peak_mb(self):
+        return round(self.children_peak / 1024 / 1024, 1) if self.children_peak is not None else None
+
+def timed_stage(results, name, file_count, func, workers=0):
+    """Runs func and records its wall time and peak RSS; file_count may be None to count func's result.
+
+    With workers, the workers' combined peak RSS during the stage is recorded,
+    and the largest single worker so far (RUSAGE_CHILDREN).
+    """
+    sampler = RssSampler(children=bool(workers))
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        value = func()
+    finally:
+        elapsed = time.perf_counter() - start
+        sampler.stop()
+    if file_count is None:
+        file_count = len(value)
+    results[name] = {
+        "seconds": round(elapsed, 4),
+        "files": file_count,
+        "files_per_sec": round(file_count / elapsed, 2) if elapsed and file_count else None,
+        "peak_rss_mb": sampler.peak_mb,
+    }
+    if workers:
+        results[name]["workers_peak_rss_mb"] = sampler.children_peak_mb
+        results[name]["workers_max_rss_mb"] = children_max_rss_mb()
+    logging.warning(f"{name:<24} {elapsed:8.3f}s  {file_count:6d} files")
+    return value
+
+def load_ingester():
+    """Imports the ingester as INGESTION_MODULE (once per process), so its worker jobs can be pickled."""
+    module = sys.modules.get(INGESTION_MODULE)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(INGESTION_MODULE, INGESTION_SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[INGESTION_MODULE] = module
+        spec.loader.exec_module(module)
+    return module
+
+if __name__ == "__mp_main__":
+    # A spawned worker (Windows, or --start-method spawn) imports this script as __mp_main__ before it
+    # unpickles any job; the ingester's file name isn't importable, so register it the same way here
+    load_ingester()
+
+def run_benchmark(pdf_folder, word_folder, workers):
+    ingester = load_ingester()
+    results = {}
+    with ingester.app.app_context():
+        ingester.ensure_schema()
+        for file_type, folder, extension, loader in (
+                ("pdf", pdf_folder, ".pdf", ingester.load_pdf_files_to_db),
+                ("word", word_folder, ".docx", ingester.load_word_files_to_db)):
+            manifest = ingester.load_manifest(file_type)
+            jobs = timed_stage(results, f"{file_type}_scan", None,
+                               lambda: list(ingester.find_work_order_files(folder, extension, manifest)))
+
+            # Both modes produce the same data dicts (thumbnails included), so their stages compare
+            if workers:
+                extract = lambda: dict(ingester.extract_files_parallel(jobs, file_type, workers))
+            else:
+                extract = lambda: dict(ingester.extract_files(jobs, file_type))
+            data = timed_stage(results, f"{file_type}_extract", len(jobs), extract, workers)
+            timed_stage(results, f"{file_type}_load", len(data), lambda: loader(data))
+
+            # Second pass with nothing changed: the cost of a no-op run
+            manifest = ingester.load_manifest(file_type)
+            timed_stage(results, f"{file_type}_rescan_unchanged", len(jobs),
+                        lambda: list(ingester.find_work_order_files(folder, extension, manifest)))
+    return results
+
+def compare_with_baseline(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["stages"]
+    print(f"\n{'stage':<24} {'baseline':>10} {'current':>10} {'change':>8}")
+    for stage, current in results.items():
+        before = baseline.get(stage)
+        if not before or not before["seconds"]:
+            print(f"{stage:<24} {'-':>10} {current['seconds']:>10.3f}")
+            continue
+        change = (current["seconds"] - before["seconds"]) / before["seconds"] * 100
+        print(f"{stage:<24} {before['seconds']:>10.3f} {current['seconds']:>10.3f} {change:>+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdfs", type=int, default=200, help="number of WO PDFs to generate")
+    parser.add_argument("--words", type=int, default=200, help="number of serial-number docx files to generate")
+    parser.add_argument("--lines", type=int, default=15, help="typical line items per WO")
+    parser.add_argument("--workers", type=int, default=0, help="extraction processes (0 = sequential)")
+    parser.add_argument("--start-method", choices=multiprocessing.get_all_start_methods(),
+                        help="multiprocessing start method for --workers (default: the platform's; "
+                             "spawn is what Windows uses)")
+    parser.add_argument("--corpus-dir", help="reuse / keep the corpus here instead of a temp dir")
+    parser.add_argument("--db-uri", help="database to ingest into (default: fresh SQLite file)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.start_method:
+        multiprocessing.set_start_method(args.start_method)
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    work_dir = tempfile.mkdtemp(prefix="wo_bench_")
+    corpus_dir = args.corpus_dir or os.path.join(work_dir, "corpus")
+
+    # Configure the ingester before it is imported: isolated DB, cold caches, no prior snapshots,
+    # and thumbnails / profiles kept out of the real directories
+    os.environ["FILE_LOG_DATABASE_URI"] = args.db_uri or f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ["WO_EXTRACTION_CACHE_DIR"] = os.path.join(work_dir, "extraction_cache")
+    os.environ["WO_SCAN_SNAPSHOT_DIR"] = os.path.join(work_dir, "scan_snapshots")
+    os.environ["WO_THUMBNAIL_DIR"] = os.path.join(work_dir, "thumbnails")
+    os.environ["WO_PROFILE_DIR"] = os.path.join(work_dir, "profiles")
+
+    start = time.perf_counter()
+    if args.corpus_dir and os.path.isdir(os.path.join(corpus_dir, "pdf")):
+        pdf_folder, word_folder = os.path.join(corpus_dir, "pdf"), os.path.join(corpus_dir, "word")
+    else:
+        pdf_folder, word_folder = generate_corpus(corpus_dir, args.pdfs, args.words, args.lines, args.seed)
+    logging.warning(f"Corpus ready in {time.perf_counter() - start:.1f}s at {corpus_dir}")
+
+    stages = run_benchmark(pdf_folder, word_folder, args.workers)
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "stages": stages,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logging.warning(f"Results written to {args.output}")
+    if args.baseline:
+        compare_with_baseline(stages, args.baseline)
+
+if __name__ == "__main__":
+    main()
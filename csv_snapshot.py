@@ -0,0 +1,99 @@
+import os
+import json
+import hashlib
+import logging
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # snapshots are an optimization; without pyarrow the CSV is parsed every time
+    pa = None
+
+# Normalized (stripped, lowercased) part number of the first column, stored as a categorical
+PART_KEY = "Part_Key"
+# Bump when the snapshot layout or the normalization changes, so old snapshots are rebuilt
+SNAPSHOT_FORMAT = 1
+# String columns with at most this share of distinct values are dictionary-encoded
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.5
+
+def read_quickbooks_csv(path):
+    try:
+        return pd.read_csv(path, encoding="ISO-8859-1")
+    except UnicodeDecodeError:
+        return pd.read_csv(path, encoding="latin1")
+
+def add_part_key(df):
+    first_column = df[df.columns[0]]
+    if first_column.dtype == object:
+        df[PART_KEY] = first_column.str.strip().str.lower().astype("category")
+    return df
+
+def compact_columns(df, plain_columns=()):
+    """Turns repetitive string columns into categoricals, leaving plain_columns (and the first column) alone."""
+    keep = set(plain_columns) | {df.columns[0]}
+    for column in df.columns:
+        if column in keep or df[column].dtype != object:
+            continue
+        values = df[column]
+        if values.nunique(dropna=True) <= len(values) * CATEGORICAL_MAX_UNIQUE_RATIO:
+            df[column] = values.astype("category")
+    return df
+
+def snapshot_path_for(csv_path, snapshot_dir):
+    digest = hashlib.sha1(os.path.abspath(csv_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(snapshot_dir, f"{digest}.arrow")
+
+def _source_tag(stat, plain_columns):
+    return {"format": SNAPSHOT_FORMAT, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "plain_columns": sorted(plain_columns)}
+
+def _read_snapshot(snapshot_path, tag):
+    try:
+        # A plain read: to_pandas copies into the numpy/object columns the builders expect anyway
+        with pa.OSFile(snapshot_path, 'rb') as source:
+            reader = pa.ipc.open_file(source)
+            metadata = reader.schema.metadata or {}
+            if json.loads(metadata.get(b"wo_source", b"{}")) != tag:
+                return None
+            return reader.read_all().to_pandas()
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+
+def _write_snapshot(df, snapshot_path, tag):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"wo_source": json.dumps(tag).encode()})
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    # Uncompressed Arrow IPC: loading it is a read plus a copy into pandas, with no decompression
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, snapshot_path)
+
+def load_quickbooks_table(csv_path, snapshot_dir=None, plain_columns=()):
+    """Reads a QuickBooks CSV export with PART_KEY added and repetitive strings as categoricals.
+
+    With a snapshot_dir, the typed table is cached as an uncompressed Arrow
+    file next to the others and the CSV is only parsed again when its size
+    or mtime changes. This is a parse cache: a snapshot load skips CSV
+    parsing, type inference and key normalization, but the DataFrame is a
+    full in-memory copy, and PART_KEY sits alongside the raw first column
+    (which the builders still need), so it is not smaller than read_csv's.
+    plain_columns keep the dtype read_csv gives them.
+    """
+    if snapshot_dir and pa is not None:
+        stat = os.stat(csv_path)
+        tag = _source_tag(stat, plain_columns)
+        snapshot_path = snapshot_path_for(csv_path, snapshot_dir)
+        df = _read_snapshot(snapshot_path, tag)
+        if df is not None:
+            return df
+
+    df = compact_columns(add_part_key(read_quickbooks_csv(csv_path)), plain_columns)
+    if snapshot_dir and pa is not None:
+        try:
+            _write_snapshot(df, snapshot_path, tag)
+            logging.info(f"Wrote columnar snapshot of {csv_path} to {snapshot_path}")
+        except (OSError, pa.ArrowException) as e:
+            logging.warning(f"Could not write columnar snapshot of {csv_path}: {e}")
+    return df
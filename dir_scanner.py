@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import namedtuple
+
+# files: {file_path: (size, mtime)} for everything currently in the tree
+# added / changed / removed: sets of file paths relative to the previous snapshot
+ScanResult = namedtuple("ScanResult", ["files", "added", "changed", "removed"])
+
+def snapshot_path_for(root, snapshot_dir):
+    digest = hashlib.sha1(root.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(snapshot_dir, f"{digest}.json")
+
+def load_snapshot(snapshot_path):
+    try:
+        with open(snapshot_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_snapshot(snapshot_path, snapshot):
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, snapshot_path)
+
+def scan_tree(root, extensions, previous=None, full=False, max_age=0):
+    """Lists a directory tree with os.scandir and returns a snapshot dict, or None if root is unreachable.
+
+    The size/mtime of each file comes from the listing itself (free on Windows
+    and SMB), so by default every directory is listed again and a file
+    rewritten in place shows up as a changed size/mtime. With max_age > 0, a
+    directory whose mtime matches the previous snapshot and that was listed
+    less than max_age seconds ago keeps its entries (only its subdirectories
+    are stat'ed). Directory mtimes don't move when a file is overwritten in
+    place, so such a rewrite is only seen once the listing is max_age old.
+    full=True lists everything regardless.
+    """
+    extensions = tuple(extension.lower() for extension in extensions)
+    if previous and previous.get("extensions") != list(extensions):
+        previous = None
+    previous_dirs = previous["dirs"] if previous else {}
+
+    try:
+        os.stat(root)
+    except OSError as e:
+        logging.error(f"Cannot scan {root}: {e}")
+        return None
+
+    now = time.time()
+    dirs = {}
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        previous_entry = previous_dirs.get(path)
+        try:
+            dir_mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            continue  # directory removed since the parent was listed
+        except OSError as e:
+            logging.warning(f"Cannot stat {path}, keeping previous snapshot: {e}")
+            dir_mtime = None
+
+        reusable = (not full and max_age > 0 and previous_entry and previous_entry["mtime"] == dir_mtime
+                    and now - previous_entry.get("listed_at", 0) < max_age)
+        if previous_entry and (dir_mtime is None or reusable):
+            entry = previous_entry
+        else:
+            files = {}
+            subdirs = []
+            try:
+                with os.scandir(path) as entries:
+                    for dir_entry in entries:
+                        if dir_entry.is_dir(follow_symlinks=False):
+                            subdirs.append(dir_entry.name)
+                        elif dir_entry.name.lower().endswith(extensions):
+                            stat = dir_entry.stat()
+                            files[dir_entry.name] = [stat.st_size, stat.st_mtime]
+            except OSError as e:
+                logging.warning(f"Cannot list {path}: {e}")
+                if not previous_entry:
+                    continue
+                entry = previous_entry
+            else:
+                entry = {"mtime": dir_mtime, "files": files, "subdirs": subdirs, "listed_at": now}
+
+        dirs[path] = entry
+        stack.extend(os.path.join(path, name) for name in entry["subdirs"])
+
+    return {"root": root, "extensions": list(extensions), "dirs": dirs}
+
+def snapshot_files(snapshot):
+    if not snapshot:
+        return {}
+    return {
+        os.path.join(path, name): tuple(stat)
+        for path, entry in snapshot["dirs"].items()
+        for name, stat in entry["files"].items()
+    }
+
+def diff_snapshots(old_files, new_files):
+    added = new_files.keys() - old_files.keys()
+    removed = old_files.keys() - new_files.keys()
+    changed = {path for path in new_files.keys() & old_files.keys() if new_files[path] != old_files[path]}
+    return added, changed, removed
+
+def scan_folder(root, extensions, snapshot_dir, full=False, max_age=0):
+    """Scans root against its persisted snapshot and returns a ScanResult (None if root is unreachable)."""
+    snapshot_path = snapshot_path_for(root, snapshot_dir)
+    previous = load_snapshot(snapshot_path)
+    snapshot = scan_tree(root, extensions, previous, full=full, max_age=max_age)
+    if snapshot is None:
+        return None
+
+    old_files = snapshot_files(previous)
+    new_files = snapshot_files(snapshot)
+    added, changed, removed = diff_snapshots(old_files, new_files)
+    try:
+        save_snapshot(snapshot_path, snapshot)
+    except OSError as e:
+        logging.warning(f"Could not save directory snapshot for {root}: {e}")
+
+    logging.info(f"Scanned {root}: {len(new_files)} files, "
+                 f"{len(added)} added, {len(changed)} changed, {len(removed)} removed")
+    return ScanResult(new_files, added, changed, removed)
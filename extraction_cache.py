@@ -0,0 +1,106 @@
+import os
+import json
+import logging
+import threading
+
+def evict_lru(entries, target_bytes):
+    """Deletes the least recently used of entries (os.DirEntry, recency = mtime) until they total target_bytes.
+
+    Shared by the on-disk caches. Returns (bytes left, entries deleted).
+    """
+    stats = []
+    for entry in entries:
+        try:
+            stats.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+        except OSError:  # removed by another process meanwhile
+            continue
+    stats.sort()
+    total = sum(size for _, size, _ in stats)
+    evicted = 0
+    for _, size, path in stats:
+        if total <= target_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        evicted += 1
+    return total, evicted
+
+class ExtractionCache:
+    """Content-addressed on-disk cache of extraction results with LRU eviction.
+
+    Entries are keyed by the file's content hash, its type ("pdf" / "word") and
+    the extractor version for that type, so a renamed, copied or re-saved file
+    reuses an earlier parse. Bumping a version orphans the old entries, which
+    then age out. Recency is the entry file's mtime (bumped on every hit), so the
+    watcher and a full scan can share one cache directory.
+    """
+
+    def __init__(self, directory, max_bytes, versions):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.versions = versions
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith('.json')]
+
+    def _path(self, content_hash, file_type):
+        return os.path.join(self.directory, f"{file_type}-v{self.versions[file_type]}-{content_hash}.json")
+
+    def get(self, content_hash, file_type):
+        """Returns the cached result, or None on a miss."""
+        path = self._path(content_hash, file_type)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        return value
+
+    def put(self, content_hash, file_type, value):
+        path = self._path(content_hash, file_type)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            size = os.path.getsize(tmp_path)
+            try:
+                size -= os.path.getsize(path)  # overwriting an entry only adds the difference
+            except OSError:
+                pass
+            os.replace(tmp_path, path)  # atomic, so readers never see a partial entry
+        except OSError as e:
+            logging.warning(f"Could not write extraction cache entry {path}: {e}")
+            return
+        with self._lock:
+            self._stats["writes"] += 1
+            self._total_bytes += size
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def evict(self):
+        """Deletes least recently used entries until the cache is back under 90% of max_bytes."""
+        with self._lock:
+            self._total_bytes, evicted = evict_lru(self._entries(), self.max_bytes * 0.9)
+            self._stats["evictions"] += evicted
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["bytes"] = self._total_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
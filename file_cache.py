@@ -0,0 +1,108 @@
+import os
+import glob
+import shutil
+import hashlib
+import logging
+import threading
+
+from extraction_cache import evict_lru
+
+class FileCache:
+    """Size-bounded local copies of files that live on a slow share, filled on first read.
+
+    A copy is named after the source path plus the size / mtime it was taken
+    at, so a changed source is copied again and the old copy ages out. If
+    the share can't be reached, the most recent copy is served instead.
+    Recency is the copy's mtime (bumped on every hit), like ExtractionCache.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.directory)
+                if entry.is_file() and not entry.name.endswith('.tmp')]
+
+    def _prefix(self, source_path):
+        return hashlib.sha1(source_path.encode('utf-8')).hexdigest()
+
+    def get(self, source_path):
+        """Returns (local_path, size, mtime) for source_path, copying it in on a miss.
+
+        local_path is source_path itself when the file is too big to cache.
+        Raises OSError if the source can't be read and there is no copy.
+        """
+        prefix = self._prefix(source_path)
+        extension = os.path.splitext(source_path)[1].lower()
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            copies = sorted(glob.glob(os.path.join(self.directory, f"{prefix}-*")), key=os.path.getmtime)
+            copies = [path for path in copies if not path.endswith('.tmp')]
+            if not copies:
+                raise
+            logging.warning(f"Cannot reach {source_path}, serving the cached copy")
+            with self._lock:
+                self._stats["stale"] += 1
+            size, mtime_ns = os.path.splitext(os.path.basename(copies[-1]))[0].split('-')[1:3]
+            return copies[-1], int(size), int(mtime_ns) / 1e9
+
+        if stat.st_size > self.max_bytes:
+            return source_path, stat.st_size, stat.st_mtime
+
+        local_path = os.path.join(self.directory, f"{prefix}-{stat.st_size}-{stat.st_mtime_ns}{extension}")
+        try:
+            os.utime(local_path)  # mark as recently used
+            with self._lock:
+                self._stats["hits"] += 1
+            return local_path, stat.st_size, stat.st_mtime
+        except FileNotFoundError:
+            pass
+
+        tmp_path = f"{local_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, local_path)  # atomic, so readers never see a partial copy
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        for old_copy in glob.glob(os.path.join(self.directory, f"{prefix}-*")):
+            if old_copy != local_path and not old_copy.endswith('.tmp'):
+                self._remove(old_copy)
+
+        with self._lock:
+            self._stats["misses"] += 1
+            self._total_bytes += stat.st_size
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+        return local_path, stat.st_size, stat.st_mtime
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._total_bytes -= size
+
+    def evict(self):
+        """Deletes least recently used copies until the cache is back under 90% of max_bytes."""
+        with self._lock:
+            self._total_bytes, evicted = evict_lru(self._entries(), self.max_bytes * 0.9)
+            self._stats["evictions"] += evicted
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["bytes"] = self._total_bytes
+        return stats
@@ -1,9 +1,14 @@
 import os
+import sys
 import time
 import logging
-import subprocess
+import threading
+import importlib.util
+from flask import Flask
+from werkzeug.serving import make_server
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from metrics import REGISTRY, instrument_app
 
 # Logging Configuration
 logging.basicConfig(level=logging.INFO)
@@ -19,34 +24,240 @@ WATCHED_FOLDERS = [
 # Path to your main processing script
 FILE_SCRIPT_DEBUG = r"c:\Users\Admin\OneDrive - neousys-tech\Desktop\File Watcher\File Script Debug.py"
 
+_ingester = None
+
+def load_ingester():
+    """Imports 'File Script Debug.py' once so files can be ingested in-process."""
+    global _ingester
+    if _ingester is None:
+        spec = importlib.util.spec_from_file_location("file_script_debug", FILE_SCRIPT_DEBUG)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["file_script_debug"] = module
+        spec.loader.exec_module(module)
+        with module.app.app_context():
+            module.ensure_schema()
+        _ingester = module
+    return _ingester
+
+# A file must go this long without new events or size/mtime changes before it is parsed
+DEBOUNCE_SECONDS = 2.0
+POLL_INTERVAL = 0.5
+MAX_BATCH_SIZE = 200
+# Times a path is put back in the queue after its batch failed before it is given up on
+MAX_ATTEMPTS = 5
+
+WATCHED_EXTENSIONS = ('.pdf', '.docx')
+
+# Port of this process's /metrics (queue depth plus the ingester's stage metrics); 0 = off
+METRICS_PORT = int(os.environ.get("WO_WATCHER_METRICS_PORT", "5002"))
+# Local-only by default; set e.g. WO_WATCHER_METRICS_HOST=0.0.0.0 to let a remote Prometheus scrape it
+METRICS_HOST = os.environ.get("WO_WATCHER_METRICS_HOST", "127.0.0.1")
+
+QUEUE_DEPTH = REGISTRY.gauge("wo_watcher_queue_depth", "Files waiting to settle or be ingested")
+FILE_EVENTS = REGISTRY.counter("wo_watcher_events_total", "File events received", ("action",))
+BATCH_SECONDS = REGISTRY.histogram("wo_watcher_batch_seconds", "Time to ingest or remove one settled batch")
+
+def is_temporary_file(file_name):
+    # SMB/Office temporary and lock files
+    return (file_name.startswith("~RF") and file_name.endswith(".TMP")) or file_name.startswith("~$")
+
+def is_watched_file(file_path):
+    file_name = os.path.basename(file_path)
+    return file_name.lower().endswith(WATCHED_EXTENSIONS) and not is_temporary_file(file_name)
+
+class IngestionQueue:
+    """Coalesces file events and hands settled files to the ingester in batches.
+
+    Events only record the path and the time they were seen, so the watchdog
+    observer thread never blocks. A background worker waits until a file has
+    had no events and an unchanged size/mtime for DEBOUNCE_SECONDS, then
+    ingests (or removes) every settled path in one pass. Paths whose removal
+    or ingest raised go back in the queue, up to MAX_ATTEMPTS times.
+    """
+
+    def __init__(self, debounce_seconds=DEBOUNCE_SECONDS, poll_interval=POLL_INTERVAL):
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self._pending = {}  # file_path -> {"action", "last_event", "signature", "attempts"}
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="ingestion-queue", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
+
+    def qsize(self):
+        with self._condition:
+            return len(self._pending)
+
+    def submit(self, file_path, action):
+        """Records a "changed" or "deleted" event; repeated events for a path collapse into one.
+
+        Returns True if the path was not already waiting in the queue.
+        """
+        with self._condition:
+            is_new = file_path not in self._pending
+            self._pending[file_path] = {"action": action, "last_event": time.monotonic(), "signature": None,
+                                        "attempts": 0}
+            QUEUE_DEPTH.set(len(self._pending))
+            self._condition.notify()
+        FILE_EVENTS.inc(action=action)
+        return is_new
+
+    def _collect_settled(self):
+        """Takes the settled paths out of the queue, as [(file_path, action)].
+
+        Candidates are copied under the lock but stat'ed outside it, so a slow
+        share never blocks submit() on the observer thread; a path that got a
+        new event in the meantime is left for the next pass.
+        """
+        now = time.monotonic()
+        with self._condition:
+            candidates = [(file_path, item) for file_path, item in self._pending.items()
+                          if now - item["last_event"] >= self.debounce_seconds]
+
+        checked = []
+        for file_path, item in candidates:
+            if item["action"] != "changed":
+                checked.append((file_path, item, "deleted"))
+                continue
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                checked.append((file_path, item, "deleted"))
+            except OSError:
+                continue  # share temporarily unreachable, try again later
+            else:
+                checked.append((file_path, item, (stat.st_size, stat.st_mtime)))
+
+        settled = []
+        with self._condition:
+            for file_path, item, outcome in checked:
+                if self._pending.get(file_path) is not item:
+                    continue  # replaced by a newer event while we were stat'ing
+                if outcome != "deleted" and outcome != item["signature"]:
+                    # Still being written (or first check): wait another quiet period
+                    item["signature"] = outcome
+                    item["last_event"] = now
+                    continue
+                if outcome == "deleted":
+                    item["action"] = "deleted"
+                settled.append((file_path, item["action"], item["attempts"]))
+                del self._pending[file_path]
+                if len(settled) >= MAX_BATCH_SIZE:
+                    break
+            QUEUE_DEPTH.set(len(self._pending))
+        return settled
+
+    def _requeue(self, settled):
+        """Puts paths from a failed batch back in the queue, unless a newer event already did."""
+        with self._condition:
+            for file_path, action, attempts in settled:
+                if file_path in self._pending:
+                    continue
+                if attempts + 1 >= MAX_ATTEMPTS:
+                    logging.error(f"❌ Giving up on {file_path} after {attempts + 1} failed attempt(s)")
+                    continue
+                self._pending[file_path] = {"action": action, "last_event": time.monotonic(), "signature": None,
+                                            "attempts": attempts + 1}
+            QUEUE_DEPTH.set(len(self._pending))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                if not self._pending:
+                    self._condition.wait()
+                else:
+                    self._condition.wait(self.poll_interval)
+            settled = self._collect_settled()
+            if settled:
+                self._process(settled)
+
+    def _process(self, settled):
+        """Removes and ingests a batch; each half fails (and is requeued) on its own."""
+        deleted = [entry for entry in settled if entry[1] == "deleted"]
+        changed = [entry for entry in settled if entry[1] == "changed"]
+        ingester = load_ingester()
+        with BATCH_SECONDS.time():
+            if deleted:
+                try:
+                    ingester.remove_files([file_path for file_path, _, _ in deleted])
+                except Exception as e:
+                    logging.error(f"❌ Failed to remove {len(deleted)} file(s), will retry: {e}")
+                    self._requeue(deleted)
+            if changed:
+                logging.info(f"🚀 Ingesting batch of {len(changed)} file(s)...")
+                try:
+                    ingested, failed_paths = ingester.ingest_files([file_path for file_path, _, _ in changed])
+                except Exception as e:
+                    logging.error(f"❌ Failed to ingest {len(changed)} file(s), will retry: {e}")
+                    self._requeue(changed)
+                else:
+                    logging.info(f"✅ Ingested {ingested} new or changed file(s)")
+                    if failed_paths:
+                        # Unreadable (still locked), unparseable or not saved: only these go round again
+                        failed_paths = set(failed_paths)
+                        logging.warning(f"⚠️ {len(failed_paths)} file(s) failed to ingest, will retry")
+                        self._requeue([entry for entry in changed if entry[0] in failed_paths])
+
 class FileEventHandler(FileSystemEventHandler):
-    """Handles file creation events and triggers another script."""
+    """Forwards file events to the ingestion queue without doing any work on the observer thread."""
 
-    def on_created(self, event):
-        if event.is_directory:
+    def __init__(self, ingestion_queue):
+        super().__init__()
+        self.ingestion_queue = ingestion_queue
+
+    def _submit(self, file_path, action):
+        if not is_watched_file(file_path):
+            if is_temporary_file(os.path.basename(file_path)):
+                logging.debug(f"🛑 Ignoring temporary file: {file_path}")
             return
+        if self.ingestion_queue.submit(file_path, action):
+            logging.info(f"📁 File {action}: {file_path}")
 
-        file_path = event.src_path
-        file_name = os.path.basename(file_path)
+    def on_created(self, event):
+        if not event.is_directory:
+            self._submit(event.src_path, "changed")
 
-        # Ignore temporary files
-        if file_name.startswith("~RF") and file_name.endswith(".TMP"):
-            logging.info(f"🛑 Ignoring temporary file: {file_path}")
-            return
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._submit(event.src_path, "changed")
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self._submit(event.src_path, "deleted")
 
-        logging.info(f"📁 New file detected: {file_path}")
-        logging.info("🚀 Running 'File Script Debug.py'...")
+    def on_moved(self, event):
+        # Office and OneDrive save by writing a temp file and renaming it over the target
+        if not event.is_directory:
+            self._submit(event.src_path, "deleted")
+            self._submit(event.dest_path, "changed")
 
-        try:
-            # Run the script in a new terminal
-            subprocess.run(["python", FILE_SCRIPT_DEBUG], shell=True, check=True)
-            logging.info(f"✅ Successfully ran '{FILE_SCRIPT_DEBUG}'")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"❌ Failed to run '{FILE_SCRIPT_DEBUG}': {e}")
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serves GET /metrics for this process in a daemon thread."""
+    metrics_app = instrument_app(Flask("file_watcher"))
+    server = make_server(host, port, metrics_app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logging.info(f"📈 Watcher metrics on http://{host}:{port}/metrics")
+    return server
 
 def start_monitoring():
     """Starts monitoring the folders."""
-    event_handler = FileEventHandler()
+    load_ingester()
+    if METRICS_PORT:
+        start_metrics_server()
+    ingestion_queue = IngestionQueue()
+    ingestion_queue.start()
+    event_handler = FileEventHandler(ingestion_queue)
     observer = Observer()
 
     for folder in WATCHED_FOLDERS:
@@ -63,6 +274,7 @@ def start_monitoring():
     except KeyboardInterrupt:
         observer.stop()
     observer.join()
+    ingestion_queue.stop()
 
 if __name__ == "__main__":
     logging.info("🔧 Starting file watcher...")
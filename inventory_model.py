@@ -0,0 +1,584 @@
+import os
+import re
+import time
+import logging
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from csv_snapshot import PART_KEY, load_quickbooks_table
+from metrics import REGISTRY
+
+BUILD_SECONDS = REGISTRY.histogram(
+    "wo_inventory_build_seconds", "Time to build (full) or patch (incremental) the inventory model", ("kind",))
+
+# Marks "Total ..." rows while forward-filling component headers
+NO_COMPONENT = "\0"
+
+# merged_df: hierarchical WO / component table shown on the index page
+# version: increments on every rebuild in this process; signature: the source state it was built from
+# (CSV paths and mtimes, word-file data version, allocation mode), which stays meaningful across restarts
+InventorySnapshot = namedtuple(
+    "InventorySnapshot",
+    ["merged_df", "final_inventory_df", "structured_df", "wo_index", "version", "signature", "built_at"])
+
+# Per-line results of allocate_stock, shown after Missing_Qty when allocation is on
+ALLOCATION_COLUMNS = ['Allocated_Qty', 'Short_Qty', 'Projected_Remaining']
+
+# Columns the builders use with the dtype read_csv gives them; other repetitive strings load as categoricals
+SALES_ORDER_PLAIN_COLUMNS = ("Num", "Qty")
+INVENTORY_PLAIN_COLUMNS = ("On Hand", "OnHandQty")
+
+def part_keys(df):
+    """Stripped, lowercased first column, precomputed as PART_KEY when the table came from load_quickbooks_table."""
+    if PART_KEY in df.columns:
+        return df[PART_KEY]
+    first_column = df[df.columns[0]]
+    if first_column.dtype != object:
+        first_column = first_column.astype(str)
+    return first_column.str.strip().str.lower()
+
+# Function to extract numeric WO Number (digits between first and second "-")
+def extract_wo_number(order_id):
+    match = re.search(r'-(\d+)-', order_id)  # Extract numeric part
+    return match.group(1) if match else None
+
+def prepare_word_files_df(word_files_df):
+    word_files_df = word_files_df.copy()
+    # Ensure "order_id" exists and apply extraction function
+    if "order_id" in word_files_df.columns:
+        word_files_df["WO_Number"] = word_files_df["order_id"].apply(lambda x: extract_wo_number(x) if isinstance(x, str) else None)
+    else:
+        logging.warning("⚠️ 'order_id' column missing, cannot extract WO_Number.")
+        word_files_df["WO_Number"] = None
+    if "status" not in word_files_df.columns:
+        word_files_df["status"] = None
+
+    # Convert WO_Number to string for merging
+    word_files_df["WO_Number"] = word_files_df["WO_Number"].astype(str)
+    return word_files_df
+
+def build_sales_order_lines(sales_order_raw):
+    """Component, WO_Number and Required_Qty of every sales-order line, without the "Total" rows."""
+    df_sales_order = sales_order_raw.copy()
+
+    # Rename columns for clarity
+    df_sales_order.rename(columns={'Unnamed: 0': 'Component', 'Num': 'WO_Number', 'Qty': 'Required_Qty'}, inplace=True)
+
+    # Fill down the standardized (stripped, lowercased) component names
+    df_sales_order['Component'] = part_keys(sales_order_raw).ffill().astype(str)
+
+    # Remove "Total" rows to avoid duplicate sums
+    df_sales_order = df_sales_order[~df_sales_order["Component"].str.startswith("total")]
+
+    # Convert WO_Number to string for merging
+    df_sales_order["WO_Number"] = df_sales_order["WO_Number"].astype(str).str.strip()
+
+    # 🛠 Remove "SO-" prefix from WO_Number in df_sales_order
+    df_sales_order["WO_Number"] = df_sales_order["WO_Number"].str.replace(r'^SO-', '', regex=True)
+    return df_sales_order
+
+def picked_counts(word_files_df):
+    """Number of picked Word files per WO_Number; the merge in build_picked_parts counts a WO's lines once per file."""
+    return word_files_df.loc[word_files_df["status"] == "Picked", "WO_Number"].value_counts().to_dict()
+
+def build_picked_parts(sales_order_raw, word_files_df, sales_order_lines=None):
+    """Required quantity per component summed over WOs that have been picked."""
+    if sales_order_lines is None:
+        sales_order_lines = build_sales_order_lines(sales_order_raw)
+
+    # Merge sales orders with API data to add "Picked" column
+    df_sales_order = sales_order_lines.merge(
+        word_files_df[['WO_Number', 'status']],
+        on="WO_Number",
+        how="left"
+    )
+
+    # Rename status column to "Picked" and replace NaN values with "No"
+    df_sales_order.rename(columns={"status": "Picked"}, inplace=True)
+    df_sales_order["Picked"] = df_sales_order["Picked"].fillna("No")
+
+    # Filter only picked WOs before grouping
+    df_sales_order_filtered = df_sales_order[df_sales_order["Picked"] == "Picked"]
+
+    # Aggregate Picked Quantities per Component (Only for Picked WOs)
+    return (
+        df_sales_order_filtered.groupby("Component")["Required_Qty"]
+        .sum()
+        .reset_index()
+        .rename(columns={"Component": "Part_Number", "Required_Qty": "Picked"})
+    )
+
+def build_final_inventory(inventory_raw, picked_parts):
+    """On Hand, Picked and Net Available per part number."""
+    inventory_df = inventory_raw.copy()
+
+    # Standardize part numbers for merging
+    inventory_df.rename(columns={'Unnamed: 0': 'Part_Number', 'OnHandQty': 'On Hand'}, inplace=True)
+    inventory_df["Part_Number"] = part_keys(inventory_raw).astype(str)
+    inventory_df.drop(columns=[PART_KEY], errors='ignore', inplace=True)
+
+    # Merge with Inventory
+    final_inventory_df = inventory_df.merge(picked_parts, on="Part_Number", how="left")
+
+    # Fill missing Picked values with 0
+    final_inventory_df["Picked"] = final_inventory_df["Picked"].fillna(0)
+
+    final_inventory_df['Net Available'] = final_inventory_df["On Hand"] - final_inventory_df["Picked"]
+    return final_inventory_df
+
+def build_structured_df(sales_order_raw, inventory_raw):
+    """One row per WO component line, joined with warehouse stock and its availability status."""
+    sales_orders = sales_order_raw.drop(columns=[PART_KEY], errors='ignore')
+    warehouse_inventory = inventory_raw.drop(columns=[PART_KEY], errors='ignore')
+
+    # Rename columns for consistency
+    sales_orders.rename(columns={sales_orders.columns[0]: 'Component', 'Num': 'WO_Number', 'Qty': 'Required_Qty'}, inplace=True)
+    warehouse_inventory.rename(columns={'Unnamed: 0': 'Part_Number', 'On Hand': 'Stock_Available'}, inplace=True)
+
+    # Fill down the WO_Number to associate components with the correct WO
+    sales_orders['WO_Number'] = sales_orders['WO_Number'].ffill()
+
+    # Assign components based on headers: each header is carried down its detail rows
+    # until its "Total ..." row, which stops the fill
+    component = sales_orders['Component']
+    stops = component.str.startswith("Total ", na=False) | (component == "")
+    carried = component.mask(stops, NO_COMPONENT).ffill()
+    fill_rows = component.isna() & carried.notna() & (carried != NO_COMPONENT)
+    sales_orders.loc[fill_rows, 'Component'] = carried[fill_rows]
+
+    # Remove "Total" rows as they are no longer needed
+    sales_orders = sales_orders[~sales_orders['Component'].str.startswith("Total ", na=False)]
+
+    # Remove "Forwarding Charge" as it's just shipping cost
+    sales_orders = sales_orders[~sales_orders['Component'].str.contains("Forwarding Charge", na=False)]
+
+    # Standardize names for merging
+    sales_orders['Component'] = sales_orders['Component'].str.strip().str.lower()
+    warehouse_inventory['Part_Number'] = part_keys(inventory_raw)
+
+    # Merge sales orders with inventory (left join to keep all WOs)
+    structured_df = sales_orders.merge(
+        warehouse_inventory, how="left", left_on="Component", right_on="Part_Number"
+    )
+
+    # Remove rows where Required_Qty is NaN
+    structured_df = structured_df.dropna(subset=['Required_Qty'])
+
+    # Determine component status (unknown stock counts as a shortage)
+    shortage = ~(structured_df['Stock_Available'] >= structured_df['Required_Qty'])
+    structured_df['Component_Status'] = np.where(shortage, "Shortage", "Available")
+
+    # Identify missing quantities
+    missing = (structured_df['Required_Qty'] - structured_df['Stock_Available']).clip(lower=0).fillna(0)
+    structured_df['Missing_Qty'] = missing.where(shortage, 0)
+    return structured_df
+
+def allocate_stock(structured_df):
+    """Hands each component's stock to WO lines first come, first served, instead of each line seeing all of it.
+
+    Lines are ranked by sales-order Date (undated last), then by their order
+    in the export. A line gets what is left of Stock_Available after every
+    earlier line of the same component, via a grouped cumulative sum.
+    Adds ALLOCATION_COLUMNS and recomputes Component_Status / Missing_Qty
+    from them (unknown stock still counts as a shortage).
+    """
+    structured_df = structured_df.copy()
+    required = structured_df['Required_Qty'].clip(lower=0).to_numpy(dtype=float)
+    stock_known = structured_df['Stock_Available'].notna().to_numpy()
+    stock = structured_df['Stock_Available'].clip(lower=0).fillna(0).to_numpy(dtype=float)
+
+    if 'Date' in structured_df.columns:
+        dates = pd.to_datetime(structured_df['Date'], errors='coerce')
+        date_rank = np.where(dates.isna(), np.iinfo(np.int64).max, dates.to_numpy().view(np.int64))
+    else:
+        date_rank = np.zeros(len(structured_df), dtype=np.int64)
+    component_codes, _ = pd.factorize(structured_df['Component'])
+    order = np.lexsort((np.arange(len(structured_df)), date_rank, component_codes))
+
+    # Demand of this line and every earlier line of the same component
+    cumulative = np.empty(len(structured_df))
+    cumulative[order] = pd.Series(required[order]).groupby(component_codes[order]).cumsum().to_numpy()
+
+    allocated = np.clip(stock - (cumulative - required), 0, required)
+    short = required - allocated
+    structured_df['Allocated_Qty'] = allocated
+    structured_df['Short_Qty'] = short
+    structured_df['Projected_Remaining'] = np.clip(stock - cumulative, 0, None)
+
+    shortage = (short > 0) | ~stock_known
+    structured_df['Component_Status'] = np.where(shortage, "Shortage", "Available")
+    structured_df['Missing_Qty'] = np.where(shortage, short, 0)
+    return structured_df
+
+def build_merged_df(structured_df, final_inventory_df):
+    """ERP-style hierarchical table: a "Work Order N" header row followed by its "  └ component" rows."""
+    detail_columns = ['Required_Qty', 'Stock_Available', 'Component_Status', 'Missing_Qty']
+    detail_columns += [column for column in ALLOCATION_COLUMNS if column in structured_df.columns]
+
+    # One header row per WO, in order of first appearance
+    wo_codes, wo_numbers = pd.factorize(structured_df['WO_Number'])
+    headers = pd.DataFrame({
+        'WO_Number': wo_numbers,
+        'Component': [f"Work Order {wo_number}" for wo_number in wo_numbers],
+    })
+    for column in detail_columns:
+        headers[column] = ''
+    headers['_group'] = np.arange(len(wo_numbers))
+    headers['_position'] = -1
+
+    # Component rows keep their original order within each WO
+    has_component = structured_df['Component'].notna().to_numpy() & (wo_codes >= 0)
+    components = structured_df.loc[has_component, ['WO_Number', 'Component'] + detail_columns].copy()
+    components['Component'] = "  └ " + components['Component'].astype(str)
+    components['_group'] = wo_codes[has_component]
+    components['_position'] = np.arange(len(components))
+
+    erp_display_df = (
+        pd.concat([headers, components], ignore_index=True)
+        .sort_values(['_group', '_position'], kind='stable')
+        .drop(columns=['_group', '_position'])
+        .reset_index(drop=True)
+    )
+
+    # Ensure Component formatting matches for merging
+    erp_display_df["Component_Cleaned"] = erp_display_df["Component"].str.replace(r'^[^a-zA-Z0-9]+', '', regex=True)
+    final_inventory_df = final_inventory_df.copy()
+    final_inventory_df["Part_Number"] = final_inventory_df["Part_Number"].astype(str).str.strip().str.lower()
+
+    # Merge `Picked` and `Net Available` while preserving hierarchical format
+    merged_df = erp_display_df.merge(
+        final_inventory_df[["Part_Number", "Picked", "Net Available"]],
+        left_on="Component_Cleaned",
+        right_on="Part_Number",
+        how="left"
+    )
+
+    # Drop the temporary "Component_Cleaned" and "Part_Number" columns
+    merged_df.drop(columns=["Component_Cleaned", "Part_Number"], inplace=True)
+
+    # Fill missing 'Picked' and 'Net Available' values with 0
+    merged_df["Picked"] = merged_df["Picked"].fillna(0)
+    merged_df["Net Available"] = merged_df["Net Available"].fillna(0)
+
+    # Ensure Work Order headers do not get Picked or Net Available values
+    work_order_rows = merged_df['Component'].str.contains("Work Order", case=False, na=False)
+    merged_df[["Picked", "Net Available"]] = merged_df[["Picked", "Net Available"]].astype(object)
+    merged_df.loc[work_order_rows, ["Picked", "Net Available"]] = ""
+    return merged_df
+
+class WONumberIndex:
+    """Maps WO numbers, and any substring of them, to their row ranges in merged_df.
+
+    Built once per snapshot. Exact lookups are a dict hit. Substring lookups
+    binary-search a sorted list of every suffix of every (lowercased) WO
+    number, so a query costs O(log suffixes + matches) instead of a string
+    scan over the whole table.
+    """
+
+    def __init__(self, merged_df):
+        values = merged_df['WO_Number'].astype(str).to_numpy()
+        self.wo_numbers = []  # in table order
+        self.ranges = {}  # WO number -> [(start, stop), ...] row positions
+        if len(values):
+            starts = np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+            stops = np.append(starts[1:], len(values))
+            for start, stop in zip(starts.tolist(), stops.tolist()):
+                wo_number = values[start]
+                if wo_number not in self.ranges:
+                    self.ranges[wo_number] = []
+                    self.wo_numbers.append(wo_number)
+                self.ranges[wo_number].append((start, stop))
+
+        self._position = {wo_number: i for i, wo_number in enumerate(self.wo_numbers)}
+        self._exact = {wo_number.lower(): wo_number for wo_number in self.wo_numbers}
+        suffixes = [(key[i:], i_wo) for i_wo, wo_number in enumerate(self.wo_numbers)
+                    for key in (wo_number.lower(),) for i in range(len(key))]
+        suffixes.sort()
+        self._suffix_keys = [suffix for suffix, _ in suffixes]
+        self._suffix_wos = [i_wo for _, i_wo in suffixes]
+
+    def lookup(self, wo_number):
+        """Exact (case-insensitive) match, or None."""
+        return self._exact.get(wo_number.strip().lower())
+
+    def search(self, query):
+        """WO numbers containing query, in table order."""
+        query = query.strip().lower()
+        if not query:
+            return list(self.wo_numbers)
+        matches = set()
+        i = bisect_left(self._suffix_keys, query)
+        while i < len(self._suffix_keys) and self._suffix_keys[i].startswith(query):
+            matches.add(self._suffix_wos[i])
+            i += 1
+        return [self.wo_numbers[i_wo] for i_wo in sorted(matches)]
+
+    def row_positions(self, wo_numbers):
+        """Row positions in merged_df of the given WOs (header plus components), grouped per WO."""
+        ranges = [np.arange(start, stop) for wo_number in wo_numbers for start, stop in self.ranges.get(wo_number, ())]
+        return np.concatenate(ranges) if ranges else np.array([], dtype=int)
+
+INVENTORY_SORTS = ("WO_Number", "shortages", "missing_qty")
+COMPONENT_STATUSES = ("Available", "Shortage")
+
+def page_inventory(merged_df, wo_index, wo_query="", status=None, sort="WO_Number", descending=False, page=1, limit=50):
+    """Returns (page_df, total_work_orders) for one page of the hierarchical table.
+
+    Pages are cut by work order, so each WO header always travels with its
+    component rows. wo_query is a case-insensitive substring match on
+    WO_Number answered from wo_index; status keeps only component rows with
+    that Component_Status (and WOs that have at least one). sort orders WOs
+    by number, shortage count or total missing qty.
+    """
+    if wo_query:
+        merged_df = merged_df.iloc[wo_index.row_positions(wo_index.search(wo_query))]
+
+    is_header = merged_df['Component'].str.startswith("Work Order", na=False)
+    wo_numbers = merged_df['WO_Number'].astype(str)
+
+    row_mask = pd.Series(True, index=merged_df.index)
+    if status:
+        row_mask &= is_header | (merged_df['Component_Status'] == status)
+
+    components = merged_df[row_mask & ~is_header]
+    shortage = components['Component_Status'] == "Shortage"
+    summary = pd.DataFrame({
+        'WO_Number': wo_numbers[components.index],
+        'shortages': shortage.astype(int),
+        'missing_qty': pd.to_numeric(components['Missing_Qty'], errors='coerce').fillna(0),
+    }).groupby('WO_Number', sort=False).sum()
+
+    if not status:
+        # WOs without any component rows still get listed
+        header_wos = wo_numbers[row_mask & is_header].unique()
+        summary = summary.reindex(pd.Index(header_wos, name='WO_Number'), fill_value=0)
+
+    sort_key = sort if sort in INVENTORY_SORTS else "WO_Number"
+    if sort_key == "WO_Number":
+        summary = summary.sort_index(ascending=not descending, kind='stable')
+    else:
+        summary = summary.sort_values(sort_key, ascending=not descending, kind='stable')
+
+    total = len(summary)
+    start = (max(page, 1) - 1) * limit
+    page_wos = summary.index[start:start + limit]
+
+    page_rows = merged_df[row_mask & wo_numbers.isin(page_wos)]
+    order = pd.Series(np.arange(len(page_wos)), index=page_wos)
+    page_df = page_rows.iloc[np.argsort(order[wo_numbers[page_rows.index]].to_numpy(), kind='stable')]
+    return page_df, total
+
+def _positions_by_key(keys):
+    """{key: positions of key in keys}, skipping the -1 of unmatched get_indexer codes."""
+    return {key: rows for key, rows in pd.Series(keys).groupby(keys).indices.items() if key != -1}
+
+def _with_own_columns(df, columns):
+    """Shallow copy of df whose given columns can be written without touching df."""
+    df = df.copy(deep=False)
+    for column in columns:
+        df[column] = df[column].copy()
+    return df
+
+class PickedTotals:
+    """Picked / Net Available per part, kept current one WO at a time.
+
+    Each WO's required quantity per part is summed once, when the frames are
+    built. When the picked Word files change, only the WOs whose picked count
+    moved are applied, as deltas, and only the final_inventory_df and
+    merged_df rows of the parts they touch are rewritten. Both frames are
+    copied before being changed, since published snapshots are shared.
+    """
+
+    def __init__(self, sales_order_lines, counts, final_inventory_df, merged_df):
+        parts = final_inventory_df["Part_Number"]
+        self._parts = pd.Index(parts.drop_duplicates())
+        inventory_codes = self._parts.get_indexer(parts)
+        # A part listed twice in the inventory duplicates its merged_df rows; those go through a full rebuild
+        self._ambiguous = set(self._parts.get_indexer(parts[parts.duplicated()]).tolist())
+        self._inventory_rows = _positions_by_key(inventory_codes)
+        self._on_hand = final_inventory_df["On Hand"].to_numpy(dtype=float)
+        self._picked = np.zeros(len(self._parts))
+        self._picked[inventory_codes] = final_inventory_df["Picked"].to_numpy(dtype=float)
+
+        # Component rows of merged_df, by the part they were joined to (same match as build_merged_df)
+        is_component = ~merged_df['Component'].str.contains("Work Order", case=False, na=False).to_numpy()
+        cleaned = merged_df['Component'].str.replace(r'^[^a-zA-Z0-9]+', '', regex=True)
+        self._merged_rows = _positions_by_key(np.where(is_component, self._parts.get_indexer(cleaned), -1))
+
+        # WO -> (part codes, required qty) for the parts in the inventory
+        per_wo = sales_order_lines.groupby(["WO_Number", "Component"], sort=False)["Required_Qty"].sum().reset_index()
+        per_wo["code"] = self._parts.get_indexer(per_wo["Component"])
+        per_wo = per_wo[per_wo["code"] >= 0]
+        codes = per_wo["code"].to_numpy()
+        qty = per_wo["Required_Qty"].to_numpy(dtype=float)
+        self._wo_lines = {wo: (codes[rows], qty[rows])
+                          for wo, rows in _positions_by_key(per_wo["WO_Number"].to_numpy()).items()}
+        self._counts = dict(counts)
+
+    def apply(self, counts, final_inventory_df, merged_df):
+        """Returns (final_inventory_df, merged_df) updated to the new picked counts, or None if a full rebuild is needed."""
+        deltas = {wo: counts.get(wo, 0) - self._counts.get(wo, 0) for wo in self._counts.keys() | counts.keys()}
+        changed = [(self._wo_lines[wo], delta) for wo, delta in deltas.items() if delta and wo in self._wo_lines]
+        touched = np.unique(np.concatenate([codes for (codes, _), _ in changed])) if changed else np.empty(0, dtype=int)
+        if self._ambiguous.intersection(touched.tolist()):
+            return None
+
+        self._counts = dict(counts)
+        for (codes, qty), delta in changed:
+            np.add.at(self._picked, codes, qty * delta)
+        if not len(touched):
+            return final_inventory_df, merged_df
+
+        inventory_rows = np.concatenate([self._inventory_rows[code] for code in touched])
+        picked = self._picked[self._parts.get_indexer(final_inventory_df["Part_Number"].iloc[inventory_rows])]
+        final_inventory_df = _with_own_columns(final_inventory_df, ("Picked", "Net Available"))
+        final_inventory_df.iloc[inventory_rows, final_inventory_df.columns.get_loc("Picked")] = picked
+        final_inventory_df.iloc[inventory_rows, final_inventory_df.columns.get_loc("Net Available")] = (
+            self._on_hand[inventory_rows] - picked)
+
+        merged_df = _with_own_columns(merged_df, ("Picked", "Net Available"))
+        for code in touched:
+            rows = self._merged_rows.get(code)
+            if rows is None:
+                continue
+            net_available = self._on_hand[self._inventory_rows[code][0]] - self._picked[code]
+            merged_df.iloc[rows, merged_df.columns.get_loc("Picked")] = float(self._picked[code])
+            merged_df.iloc[rows, merged_df.columns.get_loc("Net Available")] = (
+                0.0 if np.isnan(net_available) else float(net_available))
+        logging.info(f"📦 Picked totals: {len(changed)} WO(s) changed, {len(touched)} part(s) updated")
+        return final_inventory_df, merged_df
+
+class InventoryModel:
+    """Builds the inventory pipeline on first use and rebuilds it when its sources change.
+
+    Sources are the two QuickBooks CSV exports and the word-files feed.
+    word_files_loader returns (word_files_df, data_version). get() never
+    blocks after the first build: at most every check_interval seconds it
+    starts a background check, and if a CSV mtime or the word-file data
+    version changed, a new snapshot is built and swapped in. Until then
+    requests keep getting the previous snapshot. When only the word-file
+    data changed, Picked / Net Available are patched in place of a rebuild
+    (see PickedTotals). With allocation=True, component status comes from
+    allocate_stock rather than from each line against the full stock.
+    """
+
+    def __init__(self, sales_order_file, inventory_file, word_files_loader, check_interval=30, snapshot_dir=None,
+                 allocation=False):
+        self.sales_order_file = sales_order_file
+        self.inventory_file = inventory_file
+        self.word_files_loader = word_files_loader
+        self.check_interval = check_interval
+        self.snapshot_dir = snapshot_dir  # columnar copies of the CSVs, see csv_snapshot
+        self.allocation = allocation
+        self._snapshot = None
+        self._csv_cache = {}  # path -> (mtime, DataFrame), so an unchanged CSV is never re-read
+        self._picked_totals = None  # PickedTotals matching self._snapshot
+        self._build_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._refreshing = False
+        self._last_check = 0.0
+
+    def get(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._build_lock:
+                if self._snapshot is None:
+                    self._snapshot = self._build(*self._read_sources())
+                    self._last_check = time.monotonic()
+            return self._snapshot
+
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self._start_refresh()
+        return snapshot
+
+    def refresh(self):
+        """Rebuilds synchronously if any source changed; returns the current snapshot."""
+        with self._build_lock:
+            self._last_check = time.monotonic()
+            sources = self._read_sources()
+            if self._snapshot is None or sources[-1] != self._snapshot.signature:
+                snapshot = None
+                if self._snapshot is not None and sources[-1][:2] == self._snapshot.signature[:2]:
+                    snapshot = self._apply_word_files(self._snapshot, sources[2], sources[-1])
+                self._snapshot = snapshot or self._build(*sources)
+        return self._snapshot
+
+    def _start_refresh(self):
+        with self._state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            self._last_check = time.monotonic()
+        threading.Thread(target=self._background_refresh, name="inventory-refresh", daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logging.error(f"Inventory rebuild failed, keeping the previous snapshot: {e}")
+        finally:
+            self._refreshing = False
+
+    def _read_csv(self, path, plain_columns):
+        mtime = os.stat(path).st_mtime
+        cached = self._csv_cache.get(path)
+        if cached and cached[0] == mtime:
+            return mtime, cached[1]
+        df = load_quickbooks_table(path, self.snapshot_dir, plain_columns)
+        self._csv_cache[path] = (mtime, df)
+        return mtime, df
+
+    def _read_sources(self):
+        sales_mtime, sales_order_raw = self._read_csv(self.sales_order_file, SALES_ORDER_PLAIN_COLUMNS)
+        inventory_mtime, inventory_raw = self._read_csv(self.inventory_file, INVENTORY_PLAIN_COLUMNS)
+        word_files_df, word_version = self.word_files_loader()
+        # The CSV parts come first: refresh() compares signature[:2] to see whether only the word files moved
+        signature = ((self.sales_order_file, sales_mtime), (self.inventory_file, inventory_mtime), word_version,
+                     self.allocation)
+        return sales_order_raw, inventory_raw, word_files_df, signature
+
+    def _apply_word_files(self, snapshot, word_files_df, signature):
+        """Snapshot with only Picked / Net Available moved to word_files_df, or None when it needs a full build."""
+        if self._picked_totals is None:
+            return None
+        start = time.perf_counter()
+        try:
+            frames = self._picked_totals.apply(
+                picked_counts(prepare_word_files_df(word_files_df)), snapshot.final_inventory_df, snapshot.merged_df)
+        except Exception as e:
+            logging.error(f"Incremental picked update failed, rebuilding: {e}")
+            frames = None
+        if frames is None:
+            self._picked_totals = None
+            return None
+        final_inventory_df, merged_df = frames
+        version = snapshot.version + 1
+        elapsed = time.perf_counter() - start
+        BUILD_SECONDS.observe(elapsed, kind="incremental")
+        logging.info(f"📦 Inventory model v{version} updated in {elapsed:.3f}s")
+        return snapshot._replace(merged_df=merged_df, final_inventory_df=final_inventory_df,
+                                 version=version, signature=signature, built_at=time.time())
+
+    def _build(self, sales_order_raw, inventory_raw, word_files_df, signature):
+        start = time.perf_counter()
+        word_files_df = prepare_word_files_df(word_files_df)
+        sales_order_lines = build_sales_order_lines(sales_order_raw)
+        picked_parts = build_picked_parts(sales_order_raw, word_files_df, sales_order_lines)
+        final_inventory_df = build_final_inventory(inventory_raw, picked_parts)
+        structured_df = build_structured_df(sales_order_raw, inventory_raw)
+        if self.allocation:
+            structured_df = allocate_stock(structured_df)
+        merged_df = build_merged_df(structured_df, final_inventory_df)
+        wo_index = WONumberIndex(merged_df)
+        self._picked_totals = PickedTotals(
+            sales_order_lines, picked_counts(word_files_df), final_inventory_df, merged_df)
+        version = self._snapshot.version + 1 if self._snapshot else 1
+        elapsed = time.perf_counter() - start
+        BUILD_SECONDS.observe(elapsed, kind="full")
+        logging.info(f"📦 Inventory model v{version} built in {elapsed:.2f}s")
+        return InventorySnapshot(
+            merged_df, final_inventory_df, structured_df, wo_index, version, signature, time.time())
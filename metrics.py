@@ -0,0 +1,209 @@
+import time
+import heapq
+import logging
+import threading
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of histogram buckets, from a fast request to a slow PDF
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, label_names=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = {}  # label values -> value (or [bucket counts, sum, count] for histograms)
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.label_names, key, [("le", _format_value(bound))])
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class SlowFileLog:
+    """The size slowest files to parse seen by this process, exported as a gauge per file.
+
+    Parses that take at least warn_seconds are also logged as they happen.
+    """
+
+    def __init__(self, name, help, size=20, warn_seconds=10.0):
+        self.name = name
+        self.help = help
+        self.size = size
+        self.warn_seconds = warn_seconds
+        self._lock = threading.Lock()
+        self._heap = []  # (seconds, file_type, file_path), slowest size entries
+
+    def record(self, file_type, file_path, seconds):
+        if seconds >= self.warn_seconds:
+            logging.warning(f"🐢 Slow {file_type} file: {file_path} took {seconds:.2f}s to parse")
+        with self._lock:
+            entry = (seconds, file_type, file_path)
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, entry)
+            elif entry > self._heap[0]:
+                heapq.heapreplace(self._heap, entry)
+
+    def entries(self):
+        """[(seconds, file_type, file_path)], slowest first."""
+        with self._lock:
+            return sorted(self._heap, reverse=True)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for seconds, file_type, file_path in self.entries():
+            labels = _format_labels(("file_type", "file"), (file_type, file_path))
+            lines.append(f"{self.name}{labels} {_format_value(seconds)}")
+        return lines
+
+class Registry:
+    """Process-wide set of metrics rendered in the Prometheus text format.
+
+    Asking for a metric that already exists returns it, so modules that are
+    loaded by path (or twice) can declare theirs at import time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {type(metric).__name__}")
+            return metric
+
+    def counter(self, name, help, label_names=()):
+        return self._get_or_create(Counter, name, help, label_names)
+
+    def gauge(self, name, help, label_names=()):
+        return self._get_or_create(Gauge, name, help, label_names)
+
+    def histogram(self, name, help, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help, label_names, buckets=buckets)
+
+    def slow_file_log(self, name, help, size=20, warn_seconds=10.0):
+        return self._get_or_create(SlowFileLog, name, help, size=size, warn_seconds=warn_seconds)
+
+    def render(self):
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "wo_http_request_seconds", "Time to handle a request, by route", ("route", "method", "status"))
+
+def timed_call(func, *args):
+    """Returns (func(*args), seconds); module-level so process pool workers can time their own work."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def instrument_app(app, registry=REGISTRY):
+    """Records per-route request latency and serves registry at GET /metrics."""
+    from flask import g, request, Response
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_request_start = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        start = g.pop('metrics_request_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"  # templates, not raw paths
+            REQUEST_SECONDS.observe(time.perf_counter() - start,
+                                    route=route, method=request.method, status=response.status_code)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    return app
@@ -0,0 +1,180 @@
+import os
+import re
+import time
+import hmac
+import cProfile
+import logging
+import functools
+import threading
+
+# Request header that turns profiling on for one request when it carries the admin token
+PROFILE_HEADER = "X-Profile-Token"
+
+def _slug(text):
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', text).strip('_')[:80] or "root"
+
+class Profiler:
+    """Opt-in cProfile runs of chosen code paths, written as .prof files to a rotating directory.
+
+    targets names the paths profiled on every call (e.g. "index", "pdf");
+    with a token, a request to a wrapped view that sends PROFILE_HEADER with
+    that token is profiled too. match, if given, limits profiling to labels
+    (route paths / file names) containing it. Only the newest keep profiles
+    are kept. wrap() and wrap_view() hand back the function untouched when
+    nothing could ever switch them on, so a disabled profiler costs nothing.
+    cProfile allows one active profiler per process, so a call that comes in
+    while another is being profiled simply runs unprofiled.
+    """
+
+    def __init__(self, directory, targets=(), token=None, keep=50, match=None):
+        self.directory = directory
+        self.targets = frozenset(targets)
+        self.token = token
+        self.keep = keep
+        self.match = match
+        self._lock = threading.Lock()
+        self._active = threading.Lock()  # held while a profile is being recorded
+
+    def enabled_for(self, target):
+        return "all" in self.targets or target in self.targets
+
+    def _matches(self, label):
+        return not self.match or self.match.lower() in label.lower()
+
+    def _start(self):
+        """(profile, start time), or None if another profile is being recorded."""
+        if not self._active.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiling tool (a debugger, coverage) owns the hook
+            self._active.release()
+            return None
+        return profile, time.perf_counter()
+
+    def _finish(self, profile, start, target, label):
+        profile.disable()
+        self._active.release()
+        elapsed = time.perf_counter() - start
+        now = time.time()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now)) + f"-{int(now * 1_000_000) % 1_000_000:06d}"  # sorts by time
+        path = os.path.join(self.directory, f"{stamp}-{target}-{_slug(label)}.prof")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.dump_stats(path)
+        except OSError as e:
+            logging.warning(f"Could not write profile {path}: {e}")
+            return
+        logging.info(f"🔬 Profiled {target} {label} ({elapsed:.3f}s) -> {path}")
+        self._rotate()
+
+    def _rotate(self):
+        with self._lock:
+            try:
+                profiles = sorted(entry.path for entry in os.scandir(self.directory) if entry.name.endswith('.prof'))
+            except OSError:
+                return
+            for path in profiles[:-self.keep] if self.keep > 0 else []:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def call(self, target, label, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) under the profiler and writes the profile as target / label."""
+        started = self._start()
+        if started is None:
+            return func(*args, **kwargs)
+        profile, start = started
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._finish(profile, start, target, label)
+
+    def wrap(self, target, label=None):
+        """Decorator profiling every call when target is enabled; label(*args) names the profile."""
+        def decorator(func):
+            if not self.enabled_for(target):
+                return func
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                name = label(*args, **kwargs) if label else func.__name__
+                if not self._matches(name):
+                    return func(*args, **kwargs)
+                return self.call(target, name, func, *args, **kwargs)
+            return wrapper
+        return decorator
+
+    def wrap_view(self, target):
+        """Decorator for a Flask view: profiled when target is enabled or the request carries the token.
+
+        A streamed body is profiled while it is generated, and the profile is
+        written when the response is closed.
+        """
+        def decorator(view):
+            if not self.enabled_for(target) and not self.token:
+                return view
+            from flask import request, make_response
+
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self._requested(target) or not self._matches(request.path):
+                    return view(*args, **kwargs)
+                label = request.full_path.rstrip('?')
+                started = self._start()
+                if started is None:
+                    return view(*args, **kwargs)
+                profile, start = started
+                try:
+                    response = make_response(view(*args, **kwargs))
+                except BaseException:
+                    self._finish(profile, start, target, label)
+                    raise
+                if not response.is_streamed:
+                    self._finish(profile, start, target, label)
+                    return response
+                profile.disable()
+                finished = []
+
+                def finish():
+                    if not finished:
+                        finished.append(True)
+                        self._finish(profile, start, target, label)
+                response.response = self._profiled_stream(response.response, profile)
+                response.call_on_close(finish)  # runs even if the body is never iterated
+                return response
+            return wrapper
+        return decorator
+
+    def _requested(self, target):
+        from flask import request
+        if self.enabled_for(target):
+            return True
+        sent = request.headers.get(PROFILE_HEADER)
+        return bool(sent) and hmac.compare_digest(sent.encode(), self.token.encode())
+
+    def _profiled_stream(self, body, profile):
+        iterator = iter(body)
+        while True:
+            profile.enable()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                profile.disable()
+            yield chunk
+
+def profiler_from_env(default_directory):
+    """Profiler configured from WO_PROFILE (comma-separated targets, or "all"), WO_PROFILE_TOKEN,
+    WO_PROFILE_DIR, WO_PROFILE_KEEP and WO_PROFILE_MATCH."""
+    targets = [target.strip() for target in os.environ.get("WO_PROFILE", "").split(',') if target.strip()]
+    return Profiler(
+        os.environ.get("WO_PROFILE_DIR", default_directory),
+        targets=targets,
+        token=os.environ.get("WO_PROFILE_TOKEN") or None,
+        keep=int(os.environ.get("WO_PROFILE_KEEP", "50")),
+        match=os.environ.get("WO_PROFILE_MATCH") or None,
+    )
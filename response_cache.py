@@ -0,0 +1,97 @@
+import hashlib
+import threading
+import functools
+from collections import OrderedDict
+from flask import request, make_response
+from werkzeug.http import is_resource_modified
+
+class ResponseCache:
+    """Size-bounded LRU of rendered response bodies keyed by (route, query, version).
+
+    A key only ever maps to one body, so entries are never invalidated; once the
+    data version moves on, old entries simply stop being asked for and age out.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (body, mimetype)
+        self._total_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry
+
+    def put(self, key, body, mimetype):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= len(old[0])
+            self._entries[key] = (body, mimetype)
+            self._total_bytes += len(body)
+            while self._total_bytes > self.max_bytes:
+                _, (evicted_body, _) = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted_body)
+                self._stats["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._total_bytes
+        return stats
+
+def conditional_get(cache, get_version):
+    """Decorates a GET view with ETag / Last-Modified, 304s and the response cache.
+
+    get_version() returns (version, last_modified) for the data the view
+    renders, where version is any hashable that changes whenever that data
+    does and last_modified is an aware datetime (or None). When it returns
+    None the view runs uncached. Non-200 and streamed responses are never
+    cached, but streamed ones still get validators and 304s.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+            current = get_version()
+            if current is None:
+                return view(*args, **kwargs)
+
+            version, last_modified = current
+            query = tuple(sorted(request.args.items(multi=True)))
+            key = (request.path, query, version)
+            etag = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = make_response("", 304)
+            else:
+                entry = cache.get(key)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    if not response.is_streamed:  # buffering a streamed body would defeat the point
+                        cache.put(key, response.get_data(), response.mimetype)
+                else:
+                    body, mimetype = entry
+                    response = make_response(body)
+                    response.mimetype = mimetype
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'no-cache'  # clients may keep it, but must revalidate
+            return response
+        return wrapper
+    return decorator
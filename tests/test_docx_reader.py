@@ -0,0 +1,77 @@
+import os
+import random
+import importlib.util
+
+import pytest
+
+docx = pytest.importorskip("docx")
+
+INGESTION_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "File Script Debug.py")
+
+@pytest.fixture(scope="module")
+def ingester(tmp_path_factory):
+    """The ingester loaded by path against a throwaway SQLite database and cache directories."""
+    work_dir = tmp_path_factory.mktemp("ingester")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("FILE_LOG_DATABASE_URI", f"sqlite:///{work_dir / 'test.db'}")
+        for name in ("WO_EXTRACTION_CACHE_DIR", "WO_SCAN_SNAPSHOT_DIR", "WO_THUMBNAIL_DIR", "WO_PROFILE_DIR"):
+            monkeypatch.setenv(name, str(work_dir / name.lower()))
+        spec = importlib.util.spec_from_file_location("file_script_debug_under_test", INGESTION_SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+WORDS = ["NRU-52S-JT", "POC-400", "SN12345678", "1", "", " padded ", "Ünïcode ✓", "a&b <c>", "tab"]
+
+def random_cell_text(rng, cell):
+    """Fills a python-docx cell with 1-3 paragraphs of runs, tabs and line breaks."""
+    for i in range(rng.randint(1, 3)):
+        paragraph = cell.paragraphs[0] if i == 0 else cell.add_paragraph()
+        for _ in range(rng.randint(0, 3)):
+            run = paragraph.add_run(rng.choice(WORDS))
+            extra = rng.random()
+            if extra < 0.15:
+                run.add_tab()
+            elif extra < 0.3:
+                run.add_break()
+            if rng.random() < 0.1:
+                run.bold = True
+
+def write_random_docx(path, rng):
+    document = docx.Document()
+    for _ in range(rng.randint(0, 3)):
+        document.add_paragraph(rng.choice(WORDS))
+    for _ in range(rng.randint(0, 2)):
+        table = document.add_table(rows=rng.randint(1, 6), cols=rng.randint(1, 5))
+        for row in table.rows:
+            for cell in row.cells:
+                random_cell_text(rng, cell)
+        if rng.random() < 0.2:
+            # Nested tables are not part of their cell's text in either reader
+            table.cell(0, 0).add_table(rows=1, cols=1).cell(0, 0).text = "nested"
+        document.add_paragraph(rng.choice(WORDS))
+    document.save(path)
+
+@pytest.mark.parametrize("seed", range(30))
+def test_fast_reader_matches_python_docx(ingester, tmp_path, seed):
+    path = tmp_path / f"WO-{seed}.docx"
+    write_random_docx(path, random.Random(seed))
+    assert ingester.read_first_docx_table(path) == ingester.read_first_docx_table_with_python_docx(path)
+
+def test_merged_cells_fall_back_to_python_docx(ingester, tmp_path):
+    path = tmp_path / "WO-merged.docx"
+    document = docx.Document()
+    table = document.add_table(rows=3, cols=4)
+    for cell, title in zip(table.rows[0].cells, ["Product Number", "QTY", "SN", "Notes"]):
+        cell.text = title
+    for row, sn in zip(table.rows[1:], ["SN1", "SN2"]):
+        row.cells[0].text, row.cells[2].text = "POC-400", sn
+    table.cell(1, 1).merge(table.cell(2, 1)).text = "2"
+    document.save(path)
+
+    with pytest.raises(ingester.DocxFastPathUnsupported):
+        ingester.read_first_docx_table(path)
+    assert ingester.extract_product_details_from_word(str(path)) == [
+        {"product_number": "POC-400", "qty": "2", "sn": "SN1", "notes": ""},
+        {"product_number": "POC-400", "qty": "2", "sn": "SN2", "notes": ""},
+    ]
@@ -0,0 +1,107 @@
+import random
+
+import pandas as pd
+import pytest
+
+import inventory_model
+from inventory_model import InventoryModel
+from test_inventory_model import write_quickbooks_csvs
+
+pytestmark = pytest.mark.filterwarnings("ignore:Setting an item of incompatible dtype:FutureWarning")
+
+WORK_ORDERS = 15
+STATUSES = ["Picked", "Picked", "Pending", None]
+
+class WordFilesFeed:
+    """Stands in for word_files_feed.get: (word_files_df, data_version) of a mutable list of files."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.version = 0
+        self.files = [self._new_file(i) for i in range(WORK_ORDERS) if rng.random() < 0.6]
+
+    def _new_file(self, n):
+        wo_number = 1000 + n % (WORK_ORDERS + 2)  # a couple of WOs that aren't on any sales order
+        return {"order_id": f"WO-{wo_number}-ACME", "file_name": f"WO-{wo_number}-ACME-{self.rng.random():.6f}.docx",
+                "status": self.rng.choice(STATUSES)}
+
+    def mutate(self):
+        """Flips statuses, adds a second file for a WO or drops one; always bumps the version."""
+        for _ in range(self.rng.randint(1, 4)):
+            action = self.rng.random()
+            if action < 0.5 and self.files:
+                self.rng.choice(self.files)["status"] = self.rng.choice(STATUSES)
+            elif action < 0.8:
+                self.files.append(self._new_file(self.rng.randrange(WORK_ORDERS + 2)))
+            elif self.files:
+                self.files.pop(self.rng.randrange(len(self.files)))
+        self.version += 1
+
+    def __call__(self):
+        return pd.DataFrame(self.files, columns=["order_id", "file_name", "status"]), self.version
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_picked_totals_match_full_rebuild(tmp_path, monkeypatch, seed):
+    rng = random.Random(seed)
+    sales_order_path, inventory_path = write_quickbooks_csvs(tmp_path, work_orders=WORK_ORDERS, seed=seed)
+    feed = WordFilesFeed(rng)
+    model = InventoryModel(sales_order_path, inventory_path, feed, check_interval=3600)
+    model.get()
+
+    full_builds = []
+    build = model._build
+    monkeypatch.setattr(model, "_build", lambda *args: full_builds.append(1) or build(*args))
+
+    for _ in range(20):
+        feed.mutate()
+        snapshot = model.refresh()
+        expected = InventoryModel(sales_order_path, inventory_path, feed).get()
+        pd.testing.assert_frame_equal(snapshot.final_inventory_df, expected.final_inventory_df, check_dtype=False)
+        pd.testing.assert_frame_equal(snapshot.merged_df, expected.merged_df, check_dtype=False)
+    assert not full_builds  # every change went through PickedTotals
+
+def test_picked_totals_leave_published_frames_alone(tmp_path):
+    sales_order_path, inventory_path = write_quickbooks_csvs(tmp_path, work_orders=WORK_ORDERS)
+    feed = WordFilesFeed(random.Random(0))
+    model = InventoryModel(sales_order_path, inventory_path, feed, check_interval=3600)
+    before = model.get()
+    merged_copy = before.merged_df.copy()
+    inventory_copy = before.final_inventory_df.copy()
+
+    for row in feed.files:
+        row["status"] = "Pending" if row["status"] == "Picked" else "Picked"
+    feed.version += 1
+    after = model.refresh()
+
+    assert after.version == before.version + 1
+    pd.testing.assert_frame_equal(before.merged_df, merged_copy)
+    pd.testing.assert_frame_equal(before.final_inventory_df, inventory_copy)
+    assert not after.final_inventory_df["Picked"].equals(before.final_inventory_df["Picked"])
+
+def test_picked_counts_count_files_per_work_order():
+    word_files_df = inventory_model.prepare_word_files_df(pd.DataFrame([
+        {"order_id": "WO-1000-ACME", "status": "Picked"},
+        {"order_id": "WO-1000-ACME", "status": "Picked"},
+        {"order_id": "WO-1001-ACME", "status": "Pending"},
+        {"order_id": "WO-1002-ACME", "status": "Picked"},
+    ]))
+    assert inventory_model.picked_counts(word_files_df) == {"1000": 2, "1002": 1}
+
+@pytest.mark.parametrize("seed", range(3))
+def test_wo_number_index_matches_a_scan(seed):
+    rng = random.Random(seed)
+    rows = []
+    for wo_number in rng.sample([f"{n}" for n in range(900, 1300)] + ["SO-77A", "12-B"], 60):
+        rows += [{"WO_Number": wo_number, "Component": f"Work Order {wo_number}"}]
+        rows += [{"WO_Number": wo_number, "Component": "  └ part"}] * rng.randint(0, 3)
+    merged_df = pd.DataFrame(rows)
+    index = inventory_model.WONumberIndex(merged_df)
+    wo_numbers = list(dict.fromkeys(merged_df["WO_Number"]))
+
+    for query in ["", "1", "10", "99", "1234", "so-", "a", " 12 ", "b"] + rng.sample(wo_numbers, 5):
+        expected = [wo for wo in wo_numbers if query.strip().lower() in wo.lower()]
+        assert index.search(query) == expected
+        positions = index.row_positions(expected)
+        assert merged_df["WO_Number"].iloc[positions].tolist() == [
+            wo for wo in merged_df["WO_Number"] if wo in set(expected)]
+    assert index.lookup(" so-77a ") == ("SO-77A" if "SO-77A" in wo_numbers else None)
@@ -0,0 +1,55 @@
+from collections import defaultdict
+
+def trigrams(text):
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TrigramIndex:
+    """In-memory case-insensitive substring index over (key, text) pairs.
+
+    Each text is split into its 3-character windows; a query of three or more
+    characters only has to check the texts that contain all of its trigrams,
+    starting from the rarest one. Shorter queries fall back to a scan of the
+    lowercased texts. This mirrors what pg_trgm gives Postgres, for SQLite.
+    """
+
+    def __init__(self, items=()):
+        self._texts = {}
+        self._postings = defaultdict(set)
+        for key, text in items:
+            self.add(key, text)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, key, text):
+        if key in self._texts:
+            self.remove(key)
+        text = (text or "").lower()
+        self._texts[key] = text
+        for gram in trigrams(text):
+            self._postings[gram].add(key)
+
+    def remove(self, key):
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        for gram in trigrams(text):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def search(self, query, limit=None):
+        """Returns the keys whose text contains query, ordered by text."""
+        query = query.lower()
+        grams = trigrams(query)
+        if grams:
+            posting_lists = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+            candidates = set(posting_lists[0]).intersection(*posting_lists[1:])
+        else:
+            candidates = self._texts.keys()
+        matches = sorted((key for key in candidates if query in self._texts[key]),
+                         key=lambda key: (self._texts[key], key))
+        return matches[:limit] if limit is not None else matches
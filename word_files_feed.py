@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import logging
+import threading
+import requests # type: ignore
+import pandas as pd
+from requests.adapters import HTTPAdapter # type: ignore
+from urllib3.util.retry import Retry
+
+WORD_FILES_COLUMNS = ["order_id", "file_name", "status"]
+
+class WordFilesFeed:
+    """Local copy of the ingester's Word file list, kept current from the /api/word-files change feed.
+
+    Each sync asks only for rows written after the cursor of the previous one
+    (and the files removed since), page by page, over a pooled session with
+    timeouts and retry with backoff. If the ingester's data was reset and the
+    cursor is ahead of it (410), the copy is rebuilt from scratch.
+
+    get() never waits on the network once there is a copy: it returns what is
+    held and a background thread refreshes it every refresh_interval seconds
+    (backing off while the API is down). The last good copy and its cursor
+    are saved to cache_path, so a restarted viewer has data immediately and
+    carries on incrementally.
+    """
+
+    def __init__(self, url, page_size=1000, cache_path=None, refresh_interval=30,
+                 timeout=(3.05, 30), retries=3, backoff_factor=0.5, first_sync_timeout=10, max_backoff=300):
+        self.url = url
+        self.page_size = page_size
+        self.cache_path = cache_path
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.first_sync_timeout = first_sync_timeout
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()  # held for a whole sync
+        self._rows = {}  # (order_id, file_name) -> row
+        self._cursor = None
+        self._etag = None  # validator of the last request made with the current cursor
+        self._current = None  # (word_files_df, cursor) handed out by get()
+        self._dirty = False  # _rows / _cursor moved on since _current was built
+        self._synced = threading.Event()  # set once a sync succeeded or a saved copy was loaded
+        self._wake = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._failures = 0
+        self._load_cache()
+
+    def get(self):
+        """Returns (word_files_df, data_version) without waiting for the API if any copy is held."""
+        self.start()
+        if not self._synced.is_set():
+            self._wake.set()
+            self._synced.wait(self.first_sync_timeout)
+        current = self._current
+        if current is None:
+            return pd.DataFrame(columns=WORD_FILES_COLUMNS), None
+        return current
+
+    def sync(self):
+        """Pulls what changed since the last sync. Returns True on success."""
+        with self._lock:
+            try:
+                self._pull()
+            except (requests.RequestException, ValueError, KeyError) as e:
+                logging.error(f"Error fetching word files: {e}")
+                return False
+            if self._dirty or self._current is None:
+                self._current = (pd.DataFrame(list(self._rows.values()), columns=WORD_FILES_COLUMNS), self._cursor)
+                self._save_cache()
+                self._dirty = False
+            self._synced.set()
+            return True
+
+    def start(self):
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="word-files-feed", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            if self.sync():
+                self._failures = 0
+                delay = self.refresh_interval
+            else:
+                self._failures += 1
+                delay = min(self.refresh_interval * 2 ** self._failures, self.max_backoff)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _pull(self):
+        resynced = False
+        while True:
+            params = {"limit": self.page_size}
+            if self._cursor:
+                params["since"] = self._cursor
+            headers = {"If-None-Match": self._etag} if self._etag else {}
+            response = self.session.get(self.url, params=params, headers=headers, timeout=self.timeout)
+
+            if response.status_code == 304:
+                break
+            if response.status_code == 410:
+                if resynced:
+                    raise requests.HTTPError("410 from the word file feed again right after a resync", response=response)
+                resynced = True
+                logging.warning("⚠️ Word file feed cursor is ahead of the ingester's data, resyncing from the start.")
+                self._rows.clear()
+                self._cursor = None
+                self._etag = None
+                self._dirty = True
+                continue
+            response.raise_for_status()
+
+            page = response.json()
+            self._apply(page)
+            if page["next_since"] != self._cursor:
+                self._cursor = page["next_since"]
+                self._etag = None
+                self._dirty = True
+            else:
+                self._etag = response.headers.get("ETag")
+            if not page.get("has_more"):
+                break
+
+    def _apply(self, page):
+        for row in page["word_files"]:
+            self._rows[(row["order_id"], row["file_name"])] = row
+        for deletion in page["deleted"]:
+            key = (deletion["order_id"], deletion["file_name"])
+            row = self._rows.get(key)
+            # A file removed and then ingested again keeps the newer row
+            if row is not None and row["change_seq"] <= deletion["change_seq"]:
+                del self._rows[key]
+        if page["word_files"] or page["deleted"]:
+            logging.info(f"Word file feed: {len(page['word_files'])} changed, {len(page['deleted'])} removed")
+
+    def _load_cache(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get("url") != self.url:
+            return
+        self._rows = {(row["order_id"], row["file_name"]): row for row in cached["rows"]}
+        self._cursor = cached["cursor"]
+        self._current = (pd.DataFrame(cached["rows"], columns=WORD_FILES_COLUMNS), self._cursor)
+        self._synced.set()
+        age = time.time() - cached.get("saved_at", 0)
+        logging.info(f"Loaded {len(self._rows)} word files from {self.cache_path} (saved {age:.0f}s ago)")
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"url": self.url, "cursor": self._cursor, "saved_at": time.time(),
+                           "rows": list(self._rows.values())}, f)
+            os.replace(tmp_path, self.cache_path)  # atomic, so a crash never leaves a partial copy
+        except OSError as e:
+            logging.warning(f"Could not save word file cache {self.cache_path}: {e}")